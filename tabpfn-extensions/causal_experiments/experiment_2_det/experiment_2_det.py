@@ -7,23 +7,33 @@ when TabPFN uses its implicit autoregressive mechanism (no DAG provided).
 Usage:
     python experiment_2.py                    # Run full experiment
     python experiment_2.py --no-resume       # Start fresh
+    python experiment_2.py --deterministic   # Bitwise-reproducible (slower) GPU kernels
+    python experiment_2.py --verbose         # Log every configuration
 """
 
 import sys
 import os
-os.environ["CUBLAS_WORKSPACE_CONFIG"] = ":4096:8"
+# Reduce allocator fragmentation across the different train_size shapes
+os.environ.setdefault("PYTORCH_CUDA_ALLOC_CONF", "expandable_segments:True")
 import torch
 import pandas as pd
 import numpy as np
 import pickle
-import matplotlib.pyplot as plt
 from pathlib import Path
 from io import StringIO
 import warnings
 import argparse
+import csv
+import logging
+import inspect
 import random
-import hashlib
-from collections import OrderedDict
+import multiprocessing as mp
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from tqdm import tqdm
+from tqdm.contrib.logging import logging_redirect_tqdm
+
+logger = logging.getLogger(__name__)
 
 # Add the causal_experiments directory to the path for local imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
@@ -45,7 +55,7 @@ from utils.scm_data import generate_scm_data, get_dag_and_config
 from utils.metrics import FaithfulDataEvaluator
 from utils.dag_utils import get_ordering_strategies, print_dag_info
 from utils.checkpoint_utils import save_checkpoint, get_checkpoint_info, cleanup_checkpoint
-from utils.experiment_utils import generate_synthetic_data_quiet, reorder_data_and_columns
+from utils.experiment_utils import generate_synthetic_data_quiet
 
 # Centralized default config
 DEFAULT_CONFIG = {
@@ -57,7 +67,11 @@ DEFAULT_CONFIG = {
     'metrics': ['mean_corr_difference', 'max_corr_difference', 'propensity_metrics', 'k_marginal_tvd'],
     'include_categorical': False,
     'n_estimators': 3,
-    'random_seed_base': 42
+    'random_seed_base': 42,
+    'deterministic': False,
+    'precision': 'bf16',  # 'bf16' (FP16 autocast fallback), 'fp16' or 'fp32'
+    'n_gpus': None,  # None = one worker per visible GPU
+    'compile': False  # torch.compile the TabPFN transformers (one compile per input shape)
 }
 
 # Preferred order for result columns
@@ -65,49 +79,186 @@ PREFERRED_ORDER = [
     'algorithm', 'train_size', 'repetition', 'seed', 'categorical', 'column_order_strategy', 'column_order'
 ]
 
-# Helper to build result row in correct order
-def build_result_row(base_info, metrics, preferred_order, metric_cols):
-    row = OrderedDict()
-    for k in preferred_order:
-        row[k] = base_info.get(k, '')
-    for k in metric_cols:
-        row[k] = metrics.get(k, '')
-    return row
+# Positions of the (train_size, repetition, column_order_strategy) key inside a result row
+RESULT_KEY_POSITIONS = [PREFERRED_ORDER.index(k) for k in ('train_size', 'repetition', 'column_order_strategy')]
+
+# Helper to build a result row as a plain tuple following the fixed result schema
+def build_result_row(base_info, metrics, result_columns):
+    return tuple(base_info[k] if k in base_info else metrics.get(k, '') for k in result_columns)
+
+def get_result_key(row):
+    return tuple(row[i] for i in RESULT_KEY_POSITIONS)
+
+def append_result_rows(path, rows, result_columns):
+    write_header = not path.exists()
+    with open(path, 'a', newline='') as f:
+        writer = csv.writer(f)
+        if write_header:
+            writer.writerow(result_columns)
+        writer.writerows(rows)
+
+def read_result_rows(path):
+    # A crash mid-append can leave a partial last line: only keep newline-terminated rows
+    with open(path, newline='') as f:
+        text = f.read()
+    text = text[:text.rfind('\n') + 1]
+    return pd.read_csv(StringIO(text)) if text else pd.DataFrame()
 
 # Utility: Evaluate metrics
 
-def evaluate_metrics(X_test, X_synth, col_names, categorical_cols, k_for_kmarginal=2):
+def evaluate_metrics_batch(X_test, synthetic_datasets, col_names, categorical_cols, column_orders, k_for_kmarginal=2):
+    # Each synthetic dataset follows its own column order; the test-set side of the metrics is shared
     evaluator = FaithfulDataEvaluator()
-    cat_col_names = [col_names[i] for i in categorical_cols] if categorical_cols else []
-    return evaluator.evaluate(
-        pd.DataFrame(X_test, columns=col_names),
-        pd.DataFrame(X_synth, columns=col_names),
-        categorical_columns=cat_col_names if cat_col_names else None,
+    return evaluator.evaluate_numpy_batch(
+        X_test, synthetic_datasets, col_names,
+        column_orders=column_orders,
+        categorical_indices=categorical_cols,
         k_for_kmarginal=k_for_kmarginal
     )
 
+# Torch backend setup: applied once per run, not per configuration
+
+def configure_torch_backends(deterministic):
+    if deterministic:
+        # Must be set before the first cuBLAS call
+        os.environ["CUBLAS_WORKSPACE_CONFIG"] = ":4096:8"
+        try:
+            torch.use_deterministic_algorithms(True)
+        except AttributeError:
+            pass  # For older PyTorch versions
+        if torch.cuda.is_available():
+            torch.backends.cudnn.deterministic = True
+            torch.backends.cudnn.benchmark = False
+    else:
+        # TF32 tensor-core matmuls and cuDNN autotuning for the TabPFN forward passes
+        torch.backends.cuda.matmul.allow_tf32 = True
+        torch.backends.cudnn.allow_tf32 = True
+        torch.backends.cudnn.benchmark = True
+
+# Model construction: built once per train_size and refit for every configuration
+
+def resolve_inference_precision(precision, device):
+    """Map config['precision'] to TabPFN's `inference_precision` argument."""
+    if precision == 'fp32':
+        return torch.float32
+    if device.type != 'cuda':
+        return 'auto'
+    if precision == 'bf16' and torch.cuda.is_bf16_supported():
+        return torch.bfloat16
+    return 'autocast'  # FP16 autocast
+
+def filter_estimator_kwargs(estimator_cls, kwargs):
+    # The TabPFN client wrapper and older tabpfn releases accept fewer constructor arguments
+    params = inspect.signature(estimator_cls.__init__).parameters
+    dropped = sorted(k for k in kwargs if k not in params)
+    if dropped:
+        logger.warning(f"{estimator_cls.__name__} does not accept {dropped}; these settings are ignored")
+    return {k: v for k, v in kwargs.items() if k in params}
+
+def configure_torch_compile():
+    import torch._dynamo
+    import torch._inductor.config as inductor_config
+    inductor_config.coordinate_descent_tuning = True
+    inductor_config.triton.unique_kernel_names = True
+    # Each (train_size, n_conditioning_features) pair is a separate static-shape graph
+    torch._dynamo.config.cache_size_limit = max(torch._dynamo.config.cache_size_limit, 64)
+
+def compile_estimator_model(estimator):
+    # fit() (re)creates `model_`, so compile it on the first fit and swap the same
+    # compiled module back in after every refit; the weights never change.
+    # Written against tabpfn 2.0.9: patches the instance `fit` and the private `executor_.model`
+    original_fit = estimator.fit
+    state = {}
+
+    def fit(*args, **kwargs):
+        result = original_fit(*args, **kwargs)
+        if 'compiled' not in state:
+            # Default mode, not 'reduce-overhead': tabpfn moves the model to the device and back to
+            # the CPU around every predict, so CUDA graphs would be re-recorded on every call
+            state['compiled'] = torch.compile(estimator.model_, dynamic=False)
+        estimator.model_ = state['compiled']
+        # The inference engine keeps its own reference to the module
+        executor = getattr(estimator, 'executor_', None)
+        if executor is not None and hasattr(executor, 'model'):
+            executor.model = state['compiled']
+        elif not state.get('warned'):
+            state['warned'] = True
+            # Logged rather than warned: this module filters out all warnings at import
+            logger.warning(
+                f"{type(estimator).__name__}: the inference engine exposes no `model` attribute in this "
+                "tabpfn version, so --compile has no effect and inference runs eagerly"
+            )
+        return result
+
+    estimator.fit = fit
+    return estimator
+
+MEMORY_SAVING_MIN_TRAIN_SIZE = 500  # Smaller training sets fit comfortably without chunking
+
+def get_size_tuned_kwargs(estimator_cls, train_size):
+    # Fixed values instead of TabPFN's per-call 'auto' tuning
+    n_jobs = min(os.cpu_count() or 1, 8)
+    params = inspect.signature(estimator_cls.__init__).parameters
+    # Newer tabpfn releases renamed `n_jobs` to `n_preprocessing_jobs`
+    jobs_key = 'n_preprocessing_jobs' if 'n_preprocessing_jobs' in params else 'n_jobs'
+    return {
+        jobs_key: n_jobs,
+        'memory_saving_mode': train_size >= MEMORY_SAVING_MIN_TRAIN_SIZE,
+    }
+
+def build_unsupervised_model(config, device, train_size):
+    estimator_kwargs = {
+        'n_estimators': config['n_estimators'],
+        'device': device,
+        'inference_precision': resolve_inference_precision(config['precision'], device),
+    }
+    clf = TabPFNClassifier(**filter_estimator_kwargs(
+        TabPFNClassifier, {**estimator_kwargs, **get_size_tuned_kwargs(TabPFNClassifier, train_size)}
+    ))
+    reg = TabPFNRegressor(**filter_estimator_kwargs(
+        TabPFNRegressor, {**estimator_kwargs, **get_size_tuned_kwargs(TabPFNRegressor, train_size)}
+    ))
+    if config['compile']:
+        if hasattr(torch, 'compile'):
+            configure_torch_compile()
+            compile_estimator_model(clf)
+            compile_estimator_model(reg)
+        else:
+            logger.warning("torch.compile is not available in this PyTorch version; running eagerly")
+    return unsupervised.TabPFNUnsupervisedModel(tabpfn_clf=clf, tabpfn_reg=reg)
+
 # Pipeline: Vanilla TabPFN with column reordering
 
-def run_vanilla_tabpfn(X_train, X_test, col_names, categorical_cols, column_order, order_strategy, config, seed, train_size, repetition):
-    X_train_reordered, col_names_reordered, categorical_cols_reordered = reorder_data_and_columns(
-        X_train, col_names, categorical_cols, column_order
-    )
-    X_test_reordered, _, _ = reorder_data_and_columns(
-        X_test, col_names, categorical_cols, column_order
-    )
-    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-    clf = TabPFNClassifier(n_estimators=config['n_estimators'], device=device)
-    reg = TabPFNRegressor(n_estimators=config['n_estimators'], device=device)
-    model = unsupervised.TabPFNUnsupervisedModel(tabpfn_clf=clf, tabpfn_reg=reg)
-    if categorical_cols_reordered:
-        model.set_categorical_features(categorical_cols_reordered)
-    model.fit(torch.from_numpy(X_train_reordered).float())
-    X_synth = generate_synthetic_data_quiet(
-        model, config['test_size'], n_permutations=config['n_permutations']
-    )
-    if torch.cuda.is_available():
-        torch.cuda.empty_cache()
-    metrics = evaluate_metrics(X_test_reordered, X_synth, col_names_reordered, categorical_cols_reordered)
+def build_column_layout(col_names, categorical_cols, column_order):
+    # Column metadata only depends on the ordering, so reorder it once per strategy;
+    # the data itself is then permuted with a plain X[:, perm]
+    categorical_cols_reordered = None
+    if categorical_cols:
+        old_to_new = {old_idx: new_idx for new_idx, old_idx in enumerate(column_order)}
+        categorical_cols_reordered = [old_to_new[col] for col in categorical_cols if col in old_to_new]
+    return {
+        'order': column_order,
+        'perm': np.asarray(column_order, dtype=np.intp),
+        'col_names': [col_names[i] for i in column_order],
+        'categorical_cols': categorical_cols_reordered,
+    }
+
+def run_vanilla_tabpfn(model, X_train, column_layout, config):
+    X_train_reordered = X_train[:, column_layout['perm']]
+    # The model is reused across configurations, so always reset categorical features
+    model.set_categorical_features(column_layout['categorical_cols'] or [])
+    # Mixed precision is applied by TabPFN itself via `inference_precision`
+    # Zero-copy host tensor: TabPFNUnsupervisedModel keeps X_ on the CPU and each
+    # estimator moves its own inputs to the device
+    X_train_tensor = torch.from_numpy(np.ascontiguousarray(X_train_reordered, dtype=np.float32))
+    with torch.inference_mode():
+        model.fit(X_train_tensor)
+        X_synth = generate_synthetic_data_quiet(
+            model, config['test_size'], n_permutations=config['n_permutations']
+        )
+    return X_synth, X_train_reordered
+
+def build_result_info(metrics, config, seed, train_size, repetition, order_strategy, column_order):
     base_info = {
         'train_size': train_size,
         'repetition': repetition,
@@ -126,65 +277,96 @@ def run_vanilla_tabpfn(X_train, X_test, col_names, categorical_cols, column_orde
                 flat_metrics[f'{metric}_{submetric}'] = subvalue
         else:
             flat_metrics[metric] = value
-    metric_cols = list(flat_metrics.keys())
-    result_row = build_result_row(base_info, flat_metrics, PREFERRED_ORDER, metric_cols)
-    return result_row
+    return base_info, flat_metrics
 
 # Main configuration orchestrator
 
 SAVE_DATA_SAMPLES = True  # Set to True to save data_samples for debugging
 
-def hash_array(arr):
-    return hashlib.md5(arr.tobytes()).hexdigest()
+def prepare_training_data(train_size, repetition, config):
+    seed = config['random_seed_base'] + repetition
+    return generate_scm_data(train_size, np.random.default_rng(seed), config['include_categorical'])
 
-def run_single_configuration(train_size, order_strategy, repetition, config, 
-                           X_test, correct_dag, col_names, categorical_cols, vanilla_column_order,
-                           data_samples_dir=None, hash_check_dict=None):
-    print(f"    Order: {order_strategy}, Rep: {repetition+1}/{config['n_repetitions']}")
+def run_single_configuration(model, X_train_original, train_size, order_strategy, repetition, config,
+                           X_test, column_layout, data_samples_dir=None):
+    logger.debug(f"Train size: {train_size}, Order: {order_strategy}, Rep: {repetition+1}/{config['n_repetitions']}")
     seed = config['random_seed_base'] + repetition
+    # TabPFN's unsupervised sampler draws from the global torch and `random` generators
+    # and takes no generator argument; torch.manual_seed also seeds every CUDA device
     torch.manual_seed(seed)
-    if torch.cuda.is_available():
-        torch.cuda.manual_seed_all(seed)
-    # Set PyTorch to deterministic mode for reproducibility
-    try:
-        torch.use_deterministic_algorithms(True)
-    except AttributeError:
-        pass  # For older PyTorch versions
-    if torch.cuda.is_available():
-        torch.backends.cudnn.deterministic = True
-        torch.backends.cudnn.benchmark = False
-    np.random.seed(seed)
     random.seed(seed)
-    X_train_original = generate_scm_data(train_size, seed, config['include_categorical'])
-    train_hash = hash_array(X_train_original)
-    test_hash = hash_array(X_test)
-    if hash_check_dict is not None:
-        key = (train_size, repetition)
-        if key in hash_check_dict:
-            prev_train_hash, prev_test_hash = hash_check_dict[key]
-            if prev_train_hash != train_hash or prev_test_hash != test_hash:
-                raise RuntimeError(f"[HASH ERROR] Train/Test data hash mismatch for train_size={train_size}, repetition={repetition}!\nPrev train hash: {prev_train_hash}\nCurrent train hash: {train_hash}\nPrev test hash: {prev_test_hash}\nCurrent test hash: {test_hash}")
-        else:
-            hash_check_dict[key] = (train_hash, test_hash)
-    result = run_vanilla_tabpfn(X_train_original, X_test, col_names, categorical_cols, vanilla_column_order, order_strategy, config, seed, train_size, repetition)
-    # Save data samples if requested
+    X_synth, X_train_reordered = run_vanilla_tabpfn(model, X_train_original, column_layout, config)
+    # Save data samples if requested (reuses the synthetic data that gets evaluated)
     if SAVE_DATA_SAMPLES and data_samples_dir:
-        X_train_reordered, col_names_reordered, _ = reorder_data_and_columns(X_train_original, col_names, categorical_cols, vanilla_column_order)
-        X_test_reordered, _, _ = reorder_data_and_columns(X_test, col_names, categorical_cols, vanilla_column_order)
+        col_names_reordered = column_layout['col_names']
+        X_test_reordered = X_test[:10, column_layout['perm']]
         file_prefix = f"order_{order_strategy}_size{train_size}_rep{repetition}"
         pd.DataFrame(X_train_reordered, columns=col_names_reordered).head(10).to_csv(data_samples_dir / f"{file_prefix}_train.csv", index=False)
         pd.DataFrame(X_test_reordered, columns=col_names_reordered).head(10).to_csv(data_samples_dir / f"{file_prefix}_test.csv", index=False)
-        # For synth, use col_names_reordered
-        device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-        clf = TabPFNClassifier(n_estimators=config['n_estimators'], device=device)
-        reg = TabPFNRegressor(n_estimators=config['n_estimators'], device=device)
-        model = unsupervised.TabPFNUnsupervisedModel(tabpfn_clf=clf, tabpfn_reg=reg)
-        if categorical_cols:
-            model.set_categorical_features(categorical_cols)
-        model.fit(torch.from_numpy(X_train_reordered).float())
-        X_synth = generate_synthetic_data_quiet(model, config['test_size'], n_permutations=config['n_permutations'])
         pd.DataFrame(X_synth, columns=col_names_reordered).head(10).to_csv(data_samples_dir / f"{file_prefix}_synth.csv", index=False)
-    return result
+    return X_synth
+
+def run_repetition(model, train_size, repetition, order_strategies, config, X_test,
+                   col_names, categorical_cols, column_layouts, data_samples_dir=None):
+    # The SCM training set only depends on (train_size, repetition): generate it once for all orderings
+    X_train_original = prepare_training_data(train_size, repetition, config)
+    synthetic_datasets = [
+        run_single_configuration(
+            model, X_train_original, train_size, order_strategy, repetition, config, X_test,
+            column_layouts[order_strategy], data_samples_dir=data_samples_dir
+        )
+        for order_strategy in order_strategies
+    ]
+    # All orderings are scored against the same test set, so evaluate them in one batch
+    all_metrics = evaluate_metrics_batch(
+        X_test, synthetic_datasets, col_names, categorical_cols,
+        [column_layouts[order_strategy]['order'] for order_strategy in order_strategies]
+    )
+    seed = config['random_seed_base'] + repetition
+    return [
+        build_result_info(metrics, config, seed, train_size, repetition, order_strategy, column_layouts[order_strategy]['order'])
+        for order_strategy, metrics in zip(order_strategies, all_metrics)
+    ]
+
+# Multi-GPU execution: one worker process per GPU, results are collected by the parent
+
+_WORKER_STATE = {}
+
+def _init_worker(device_queue, config, X_test, col_names, categorical_cols,
+                 column_layouts, data_samples_dir, log_level):
+    # Spawned workers do not inherit the parent's logging setup
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    logger.setLevel(log_level)
+    device_index = device_queue.get()
+    torch.cuda.set_device(device_index)
+    configure_torch_backends(config['deterministic'])
+    _WORKER_STATE.update(
+        models={}, device=torch.device('cuda', device_index),
+        config=config, X_test=X_test,
+        col_names=col_names, categorical_cols=categorical_cols, column_layouts=column_layouts,
+        data_samples_dir=data_samples_dir,
+    )
+
+def _run_repetition_in_worker(train_size, repetition, order_strategies):
+    state = _WORKER_STATE
+    # Keep the caching allocator warm; only release memory when tensor shapes change
+    if state.get('train_size') not in (None, train_size):
+        torch.cuda.empty_cache()
+    state['train_size'] = train_size
+    if train_size not in state['models']:
+        state['models'][train_size] = build_unsupervised_model(state['config'], state['device'], train_size)
+    return run_repetition(
+        state['models'][train_size], train_size, repetition, order_strategies, state['config'],
+        state['X_test'], state['col_names'],
+        state['categorical_cols'], state['column_layouts'],
+        data_samples_dir=state['data_samples_dir']
+    )
+
+def get_n_workers(config):
+    n_available = torch.cuda.device_count() if torch.cuda.is_available() else 0
+    if config['n_gpus'] is None:
+        return n_available
+    return min(config['n_gpus'], n_available)
 
 def run_experiment_2(config=None, output_dir="experiment_2_results", resume=True):
     """
@@ -211,49 +393,146 @@ def run_experiment_2(config=None, output_dir="experiment_2_results", resume=True
                             f"Available: {list(available_orderings.keys())}")
         pre_calculated_orders[order_strategy] = available_orderings[order_strategy]
         print(f"Pre-calculated column order for {order_strategy}: {pre_calculated_orders[order_strategy]}")
+    column_layouts = {
+        order_strategy: build_column_layout(col_names, categorical_cols, column_order)
+        for order_strategy, column_order in pre_calculated_orders.items()
+    }
+    raw_results_path = output_dir / "raw_results.csv"
+    # The checkpoint is written at the start of every run, so it marks an unfinished run
+    unfinished_run = resume and (output_dir / "checkpoint.pkl").exists()
     if resume:
         results_so_far, start_train_idx, start_rep = get_checkpoint_info(output_dir)
     else:
         results_so_far, start_train_idx, start_rep = [], 0, 0
     total_iterations = len(config['train_sizes']) * len(config['ordering_strategies']) * config['n_repetitions']
-    completed = len(results_so_far)
+    # Results are kept as tuples following a schema fixed by the first evaluated configuration.
+    # Checkpoints store them as a DataFrame (older checkpoints hold a list of dicts).
+    df_done = pd.DataFrame(results_so_far)
+    # raw_results.csv gets a row after every configuration while the checkpoint is only saved
+    # per train_size, so after a crash it holds the most complete set of finished results
+    if unfinished_run and raw_results_path.exists():
+        df_raw = read_result_rows(raw_results_path)
+        if len(df_raw) >= len(df_done):
+            df_done = df_raw.drop_duplicates(
+                subset=['train_size', 'repetition', 'column_order_strategy'], keep='last'
+            )
+    result_columns = list(df_done.columns) if len(df_done) else None
+    rows = list(df_done.itertuples(index=False, name=None))
+    completed = len(rows)
     print(f"Total iterations: {total_iterations}, Already completed: {completed}")
-    hash_check_dict = {}
+    # Build the full task list up front, skipping configurations already in the checkpoint
+    done_keys = {get_result_key(row) for row in rows}
+    all_tasks = [
+        (train_idx, train_size, rep, order_strategy)
+        for train_idx, train_size in enumerate(config['train_sizes'])
+        for rep in range(config['n_repetitions'])
+        for order_strategy in config['ordering_strategies']
+    ]
+    task_order = {(train_size, rep, order_strategy): i for i, (_, train_size, rep, order_strategy) in enumerate(all_tasks)}
+    # Group pending orderings by (train_size, repetition) so each SCM training set is generated once
+    pending_groups = {}
+    remaining_per_train_idx = Counter()
+    for train_idx, train_size, rep, order_strategy in all_tasks:
+        if (train_size, rep, order_strategy) not in done_keys:
+            pending_groups.setdefault((train_idx, train_size, rep), []).append(order_strategy)
+            remaining_per_train_idx[train_idx] += 1
+    samples_dir = data_samples_dir if SAVE_DATA_SAMPLES else None
+    n_workers = get_n_workers(config)
+
+    # raw_results.csv is rewritten once from the resumed results (dropping any partial
+    # last line), then only appended to; the swap is atomic so a crash here loses nothing
+    if rows:
+        tmp_path = raw_results_path.with_suffix('.csv.tmp')
+        tmp_path.unlink(missing_ok=True)
+        append_result_rows(tmp_path, rows, result_columns)
+        os.replace(tmp_path, raw_results_path)
+    elif raw_results_path.exists():
+        raw_results_path.unlink()
+    last_position = (start_train_idx, start_rep)
+
+    def rows_to_frame():
+        return pd.DataFrame.from_records(rows, columns=result_columns)
+
+    save_checkpoint(rows_to_frame(), *last_position, output_dir)
+
+    progress = tqdm(total=total_iterations, initial=completed, desc="Experiment 2", unit="config")
+
+    def record_result(result, train_idx, rep):
+        nonlocal completed, last_position, result_columns
+        base_info, flat_metrics = result
+        if result_columns is None:
+            result_columns = PREFERRED_ORDER + list(flat_metrics)
+        row = build_result_row(base_info, flat_metrics, result_columns)
+        rows.append(row)
+        append_result_rows(raw_results_path, [row], result_columns)
+        last_position = (train_idx, rep + 1)
+        # Checkpoint once per completed train_size instead of after every configuration
+        remaining_per_train_idx[train_idx] -= 1
+        if remaining_per_train_idx[train_idx] == 0:
+            save_checkpoint(rows_to_frame(), train_idx + 1, 0, output_dir)
+            train_size = config['train_sizes'][train_idx]
+            n_done = sum(1 for row in rows if row[RESULT_KEY_POSITIONS[0]] == train_size)
+            progress.write(f"Train size {train_size}: {n_done} configurations done, checkpoint saved")
+        completed += 1
+        progress.update(1)
+        logger.debug(f"Results saved to: {raw_results_path}")
+
     try:
-        config_idx = 0
-        for train_idx, train_size in enumerate(config['train_sizes']):
-            for rep in range(config['n_repetitions']):
-                for order_strategy in config['ordering_strategies']:
-                    if config_idx < completed:
-                        config_idx += 1
-                        continue
-                    result = run_single_configuration(
-                        train_size, order_strategy, rep, config, X_test_original,
-                        correct_dag, col_names, categorical_cols, pre_calculated_orders[order_strategy],
-                        data_samples_dir=data_samples_dir if SAVE_DATA_SAMPLES else None,
-                        hash_check_dict=hash_check_dict
+        with logging_redirect_tqdm():
+            if n_workers > 1:
+                progress.write(f"Running {total_iterations - completed} configurations on {n_workers} GPUs")
+                ctx = mp.get_context('spawn')
+                with ctx.Manager() as manager:
+                    device_queue = manager.Queue()
+                    for device_index in range(n_workers):
+                        device_queue.put(device_index)
+                    with ProcessPoolExecutor(
+                        max_workers=n_workers, mp_context=ctx, initializer=_init_worker,
+                        initargs=(device_queue, config, X_test_original, col_names,
+                                  categorical_cols, column_layouts, samples_dir, logger.getEffectiveLevel())
+                    ) as executor:
+                        futures = {
+                            executor.submit(_run_repetition_in_worker, train_size, rep, order_strategies): (train_idx, rep)
+                            for (train_idx, train_size, rep), order_strategies in pending_groups.items()
+                        }
+                        try:
+                            for future in as_completed(futures):
+                                train_idx, rep = futures[future]
+                                for result in future.result():
+                                    record_result(result, train_idx, rep)
+                        except KeyboardInterrupt:
+                            executor.shutdown(wait=False, cancel_futures=True)
+                            raise
+            else:
+                configure_torch_backends(config['deterministic'])
+                device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+                models = {}
+                prev_train_size = None
+                for (train_idx, train_size, rep), order_strategies in pending_groups.items():
+                    # Keep the caching allocator warm; only release memory when tensor shapes change
+                    if prev_train_size not in (None, train_size) and torch.cuda.is_available():
+                        torch.cuda.empty_cache()
+                    prev_train_size = train_size
+                    if train_size not in models:
+                        models[train_size] = build_unsupervised_model(config, device, train_size)
+                    results = run_repetition(
+                        models[train_size], train_size, rep, order_strategies, config, X_test_original,
+                        col_names, categorical_cols, column_layouts,
+                        data_samples_dir=samples_dir
                     )
-                    results_so_far.append(result)
-                    df_current = pd.DataFrame(results_so_far)
-                    df_current.to_csv(output_dir / "raw_results.csv", index=False)
-                    save_checkpoint(results_so_far, train_idx, rep + 1, output_dir)
-                    completed += 1
-                    config_idx += 1
-                    print(f"    Progress: {completed}/{total_iterations} ({100*completed/total_iterations:.1f}%)")
-                    print(f"    Results saved to: {output_dir}/raw_results.csv")
+                    for result in results:
+                        record_result(result, train_idx, rep)
     except KeyboardInterrupt:
+        save_checkpoint(rows_to_frame(), *last_position, output_dir)
         print("\nExperiment interrupted. Progress saved!")
-        return pd.DataFrame(results_so_far)
+        return rows_to_frame()
+    finally:
+        progress.close()
     print("\nExperiment completed!")
     cleanup_checkpoint(output_dir)
-    df_results = pd.DataFrame(results_so_far)
-    # Standardize column order for output
-    preferred_order = [
-        'algorithm', 'train_size', 'repetition', 'seed', 'categorical', 'column_order_strategy', 'column_order'
-    ]
-    metric_cols = [col for col in df_results.columns if col not in preferred_order]
-    ordered_cols = [col for col in preferred_order if col in df_results.columns] + metric_cols
-    df_results = df_results[ordered_cols]
+    # Workers finish out of order; restore the train_size/repetition/ordering order
+    rows.sort(key=lambda row: task_order[get_result_key(row)])
+    df_results = rows_to_frame()
     df_results.to_csv(output_dir / "experiment_2_results.csv", index=False)
     print(f"Results saved to: {output_dir}")
     print(f"Total results: {len(df_results)}")
@@ -267,7 +546,20 @@ def main():
                        help='Start fresh (ignore checkpoint)')
     parser.add_argument('--output', type=str, default=None,
                        help='Output directory (auto-generated if not specified)')
+    parser.add_argument('--deterministic', action='store_true',
+                       help='Use deterministic GPU kernels (disables TF32 and cuDNN autotuning)')
+    parser.add_argument('--precision', type=str, default=DEFAULT_CONFIG['precision'],
+                       choices=['bf16', 'fp16', 'fp32'],
+                       help='TabPFN inference precision')
+    parser.add_argument('--n-gpus', type=int, default=None,
+                       help='Number of GPU worker processes (default: all visible GPUs)')
+    parser.add_argument('--compile', action='store_true',
+                       help='Compile the TabPFN transformers with torch.compile')
+    parser.add_argument('--verbose', action='store_true',
+                       help='Log every configuration instead of only the progress bar')
     args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    logger.setLevel(logging.DEBUG if args.verbose else logging.INFO)
     
     # Show SCM info (only for reference, not used in experiment)
     dag, col_names, _ = get_dag_and_config(False)
@@ -284,6 +576,10 @@ def main():
     # Use centralized config
     print("Running FULL experiment...")
     config = DEFAULT_CONFIG.copy()
+    config['deterministic'] = args.deterministic
+    config['precision'] = args.precision
+    config['n_gpus'] = args.n_gpus
+    config['compile'] = args.compile
     output_dir = args.output or "experiment_2_results"
     
     # Calculate total configurations
@@ -297,6 +593,9 @@ def main():
     print(f"  Repetitions: {config['n_repetitions']}")
     print(f"  Total configurations: {total_configs}")
     print(f"  Resume: {not args.no_resume}")
+    print(f"  Deterministic: {config['deterministic']}")
+    print(f"  Precision: {config['precision']}")
+    print(f"  Compile: {config['compile']}")
     print(f"  Output: {output_dir}")
     
     # Run experiment
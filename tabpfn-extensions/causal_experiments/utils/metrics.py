@@ -11,7 +11,7 @@ import warnings
 import matplotlib
 matplotlib.use('Agg')  # Use non-interactive backend
 import matplotlib.pyplot as plt
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List
 
 # The only required external dependency is SynthEval
 from syntheval import SynthEval
@@ -73,6 +73,40 @@ def calculate_correlation_metrics(
         metrics['mean_corr_difference'] = -1.0
     return metrics
 
+def calculate_correlation_metrics_numpy(
+    real_data: np.ndarray,
+    synthetic_data: np.ndarray,
+    real_corr: np.ndarray = None
+) -> Dict[str, float]:
+    """
+    Numpy version of `calculate_correlation_metrics` for purely numerical data.
+
+    Uses Pearson correlations like SynthEval does for numerical columns, without
+    building DataFrames or a SynthEval instance. Results match SynthEval up to the
+    float32 rounding of its internal min-max scaling (~1e-9).
+
+    Args:
+        real_data: Array of real data, shape (n_samples, n_features).
+        synthetic_data: Array of synthetic data with the same columns.
+        real_corr: Optional precomputed correlation matrix of real_data.
+
+    Returns:
+        A dictionary with 'max_corr_difference' and 'mean_corr_difference'.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if real_corr is None:
+            real_corr = np.corrcoef(np.asarray(real_data, dtype=np.float64), rowvar=False)
+        synth_corr = np.corrcoef(np.asarray(synthetic_data, dtype=np.float64), rowvar=False)
+
+    abs_diff_values = np.abs(real_corr - synth_corr)
+    # SynthEval forces the diagonal of both correlation matrices to 1
+    np.fill_diagonal(abs_diff_values, 0.0)
+    upper_triangle_indices = np.triu_indices(abs_diff_values.shape[0], k=1)
+    return {
+        'max_corr_difference': np.max(abs_diff_values),
+        'mean_corr_difference': np.mean(abs_diff_values[upper_triangle_indices]),
+    }
+
 def calculate_propensity_metrics(
     real_data: pd.DataFrame,
     synthetic_data: pd.DataFrame,
@@ -129,17 +163,29 @@ def calculate_propensity_metrics(
     except Exception:
         return {new_key: -1.0 for new_key in key_map.keys()}
 
-def _discretize_for_kmarginal(
+def prepare_kmarginal_reference(
     real_data: pd.DataFrame,
-    synthetic_data: pd.DataFrame,
-    cat_cols: List[str]
-) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    cat_cols: List[str] = None
+) -> Dict[str, Any]:
     """
-    Internal function to replicate the percentile-rank-based binning logic.
-    Categorical columns are passed through without modification.
+    Precomputes everything the k-marginal metric needs from the real data, so it
+    can be shared across several synthetic datasets.
+
     Numerical columns with more than 20 unique values are discretized into 20 bins
-    using percentile rank binning.
+    using percentile rank binning; the upper edge of every bin is kept to bin
+    synthetic data later. Categorical columns are passed through without modification.
+
+    Args:
+        real_data: DataFrame of real data.
+        cat_cols: List of categorical column names.
+
+    Returns:
+        A dictionary with the binned real data, the bin edges per numerical
+        column and a cache for the real marginal densities.
     """
+    if cat_cols is None:
+        cat_cols = []
+
     numeric_features = [
         col for col in real_data.columns
         if col not in cat_cols and real_data[col].nunique() >= 20
@@ -152,21 +198,43 @@ def _discretize_for_kmarginal(
         real_binned.loc[not_na_mask, col] = ranked_pct.apply(lambda x: int(20 * x) if x < 1 else 19)
         real_binned.loc[real_data[col].isna(), col] = -1
 
-    syn_binned = synthetic_data.copy()
+    bin_edges = {}
     for col in numeric_features:
+        unique_bins = sorted([b for b in real_binned[col].unique() if b != -1])
+        bin_edges[col] = [
+            (bin_val, real_data.loc[real_binned[real_binned[col] == bin_val].index, col].max())
+            for bin_val in unique_bins
+        ]
+
+    # Ensure all columns (numeric and categorical) are returned
+    all_cols = numeric_features + cat_cols
+    return {
+        'real_binned': real_binned[all_cols].astype(int),
+        'numeric_features': numeric_features,
+        'cat_cols': cat_cols,
+        'bin_edges': bin_edges,
+        'densities': {},
+    }
+
+def _discretize_synthetic_for_kmarginal(
+    reference: Dict[str, Any],
+    synthetic_data: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Internal function to bin synthetic data with the bin edges of the real data.
+    """
+    syn_binned = synthetic_data.copy()
+    for col in reference['numeric_features']:
         syn_not_na_mask = syn_binned[col].notna()
         syn_numeric_values = pd.to_numeric(syn_binned.loc[syn_not_na_mask, col])
         binned_syn_values = syn_numeric_values.copy()
         max_value_of_previous_bin = -np.inf
-        unique_bins = sorted([b for b in real_binned[col].unique() if b != -1])
-
-        for i, bin_val in enumerate(unique_bins):
-            indices_for_bin = real_binned[real_binned[col] == bin_val].index
-            max_value_in_bin = real_data.loc[indices_for_bin, col].max()
+        edges = reference['bin_edges'][col]
 
+        for i, (bin_val, max_value_in_bin) in enumerate(edges):
             min_value_of_current_bin = max_value_of_previous_bin
             condition = (syn_numeric_values > min_value_of_current_bin)
-            if i < len(unique_bins) - 1:
+            if i < len(edges) - 1:
                 condition &= (syn_numeric_values <= max_value_in_bin)
 
             binned_syn_values.loc[condition] = bin_val
@@ -175,16 +243,16 @@ def _discretize_for_kmarginal(
         syn_binned.loc[syn_not_na_mask, col] = binned_syn_values
         syn_binned.loc[synthetic_data[col].isna(), col] = -1
 
-    # Ensure all columns (numeric and categorical) are returned
-    all_cols = numeric_features + cat_cols
-    return real_binned[all_cols].astype(int), syn_binned[all_cols].astype(int)
+    all_cols = reference['numeric_features'] + reference['cat_cols']
+    return syn_binned[all_cols].astype(int)
 
 def calculate_kmarginal_tvd(
     
     real_data: pd.DataFrame,
     synthetic_data: pd.DataFrame,
     cat_cols: List[str] = None,
-    k: int = 2
+    k: int = 2,
+    reference: Dict[str, Any] = None
 ) -> float:
     """
     Calculates the K-Marginal Total Variation Distance (TVD).
@@ -194,14 +262,19 @@ def calculate_kmarginal_tvd(
         synthetic_data: DataFrame of synthetic data.
         cat_cols: List of categorical column names.
         k: The order of marginals to compute.
+        reference: Optional output of `prepare_kmarginal_reference` for real_data,
+            to reuse the real-data binning across calls.
 
     Returns:
         The mean TVD score.
     """
     if cat_cols is None:
         cat_cols = []
-    
-    real_processed, syn_processed = _discretize_for_kmarginal(real_data, synthetic_data, cat_cols)
+    if reference is None:
+        reference = prepare_kmarginal_reference(real_data, cat_cols)
+
+    real_processed = reference['real_binned']
+    syn_processed = _discretize_synthetic_for_kmarginal(reference, synthetic_data)
     features = real_processed.columns.tolist()
 
     if len(features) < k: return 1.0
@@ -212,10 +285,14 @@ def calculate_kmarginal_tvd(
 
     if not marginals: return 1.0
 
+    real_densities = reference['densities']
     total_density_diff_sum = 0
     for marg in marginals:
         marg = list(marg)
-        t_den = real_processed.groupby(marg).size() / len(real_processed)
+        t_den = real_densities.get(tuple(marg))
+        if t_den is None:
+            t_den = real_processed.groupby(marg).size() / len(real_processed)
+            real_densities[tuple(marg)] = t_den
         s_den = syn_processed.groupby(marg).size() / len(syn_processed)
         abs_den_diff = t_den.subtract(s_den, fill_value=0).abs()
         total_density_diff_sum += abs_den_diff.sum()
@@ -265,6 +342,66 @@ class FaithfulDataEvaluator:
 
         return results
 
+    def evaluate_numpy_batch(
+        self,
+        real_data: np.ndarray,
+        synthetic_datasets: List[np.ndarray],
+        column_names: List[str],
+        column_orders: List[List[int]] = None,
+        categorical_indices: List[int] = None,
+        k_for_kmarginal: int = 2
+    ) -> List[Dict[str, float]]:
+        """
+        Evaluates several synthetic arrays against the same real data, sharing
+        the real-data preprocessing of the k-marginal metric.
+
+        Synthetic dataset i holds the columns of real_data in the order given by
+        column_orders[i]. For purely numerical data the correlation metrics are
+        computed with numpy from one shared real correlation matrix; DataFrames
+        are only built for the propensity and k-marginal metrics.
+
+        Args:
+            real_data: Array of real data, shape (n_samples, n_features).
+            synthetic_datasets: Arrays of synthetic data.
+            column_names: Column names of real_data.
+            column_orders: Column order of each synthetic dataset (default: unchanged).
+            categorical_indices: Indices of categorical columns in real_data.
+            k_for_kmarginal: The order of marginals for the k-marginal metric.
+
+        Returns:
+            One metrics dictionary per synthetic dataset, in the same order.
+        """
+        if column_orders is None:
+            column_orders = [list(range(len(column_names)))] * len(synthetic_datasets)
+        categorical_columns = [column_names[i] for i in categorical_indices or []]
+
+        real_frame = pd.DataFrame(real_data, columns=column_names)
+        reference = prepare_kmarginal_reference(real_frame, categorical_columns)
+        real_corr = None
+        if not categorical_columns:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                real_corr = np.corrcoef(np.asarray(real_data, dtype=np.float64), rowvar=False)
+
+        all_results = []
+        for synthetic_data, column_order in zip(synthetic_datasets, column_orders):
+            ordered_names = [column_names[i] for i in column_order]
+            real_ordered = real_frame[ordered_names]
+            synthetic_frame = pd.DataFrame(synthetic_data, columns=ordered_names)
+
+            results = {}
+            if categorical_columns:
+                results.update(calculate_correlation_metrics(real_ordered, synthetic_frame, categorical_columns))
+            else:
+                results.update(calculate_correlation_metrics_numpy(
+                    real_data[:, column_order], synthetic_data, real_corr[np.ix_(column_order, column_order)]
+                ))
+            results['propensity_metrics'] = calculate_propensity_metrics(real_ordered, synthetic_frame, categorical_columns)
+            results['k_marginal_tvd'] = calculate_kmarginal_tvd(
+                real_ordered, synthetic_frame, categorical_columns, k=k_for_kmarginal, reference=reference
+            )
+            all_results.append(results)
+        return all_results
+
 # --- Section 3: Example of How to Use This File ---
 if __name__ == '__main__':
     print("Example usage of the modular metric functions and wrapper class")
@@ -3,8 +3,21 @@ Simple SCM data generation - no classes, just functions.
 """
 import numpy as np
 
+# P(X5 | X2 bucket) for the low / mid / high thirds of normalized X2
+_X5_PROBS = np.array([
+    [0.7, 0.2, 0.1],
+    [0.2, 0.6, 0.2],
+    [0.1, 0.2, 0.7],
+])
+# Normalized CDFs computed exactly like Generator.choice does internally
+_X5_CDFS = np.cumsum(_X5_PROBS, axis=1)
+_X5_CDFS /= _X5_CDFS[:, -1:]
+
 def generate_scm_data(n_samples, random_state=42, include_categorical=False):
-    """Generate data from our SCM: X4 → X3 → X2 ← X1"""
+    """Generate data from our SCM: X4 → X3 → X2 ← X1
+
+    `random_state` is a seed or a `np.random.Generator`.
+    """
     rng = np.random.default_rng(random_state)
     
     # Independent variables
@@ -18,25 +31,29 @@ def generate_scm_data(n_samples, random_state=42, include_categorical=False):
     if include_categorical:
         # X5 depends on X2
         X2_norm = (X2 - X2.min()) / (X2.max() - X2.min())
+        bucket = np.where(X2_norm < 0.33, 0, np.where(X2_norm < 0.67, 1, 2))
+        # Vectorized rng.choice(3, p=probs) per row: one uniform per sample, same RNG stream
+        uniform_samples = rng.random(n_samples)
         X5 = np.zeros(n_samples, dtype=int)  # Ensure integer type
-        for i in range(n_samples):
-            if X2_norm[i] < 0.33:
-                probs = [0.7, 0.2, 0.1]
-            elif X2_norm[i] < 0.67:
-                probs = [0.2, 0.6, 0.2]
-            else:
-                probs = [0.1, 0.2, 0.7]
-            X5[i] = rng.choice(3, p=probs)
+        for b in range(3):
+            mask = bucket == b
+            X5[mask] = _X5_CDFS[b].searchsorted(uniform_samples[mask], side='right')
         
         # Create mixed data array with proper types
-        data = np.column_stack([X1, X2, X3, X4])  # Continuous variables as float32
-        data = data.astype(np.float32)
+        data = _stack_float32([X1, X2, X3, X4])  # Continuous variables as float32
         
         # Add categorical column as integer
         data_with_cat = np.column_stack([data, X5.astype(int)])
         return data_with_cat
     else:
-        return np.column_stack([X1, X2, X3, X4]).astype(np.float32)
+        return _stack_float32([X1, X2, X3, X4])
+
+def _stack_float32(columns):
+    """Stack columns straight into a float32 array, skipping the float64 intermediate."""
+    data = np.empty((len(columns[0]), len(columns)), dtype=np.float32)
+    for j, col in enumerate(columns):
+        data[:, j] = col
+    return data
 
 def get_dag_and_config(include_categorical=False):
     """Get DAG and column info."""